@@ -17,20 +17,15 @@
 
 from devnest.lib import logger
 
-from devnest.lib.jenkins import JenkinsInstance
-from requests.exceptions import ConnectionError
 from devnest.lib.exceptions import CommandError
 from devnest.lib.exceptions import NodeCliException
-from devnest.lib.exceptions import NodeReservationError
-from devnest.lib.node import NodeStatus
 
 import argparse
-import datetime
-import json
+import enum
 import logging
-from terminaltables import AsciiTable
 import sys
 import os
+import time
 
 LOG = logger.LOG
 
@@ -39,63 +34,108 @@ DEFAULT_CONFIG = [
     "/etc/jenkins_jobs/jenkins_jobs.ini"
 ]
 
-LIST_FORMATS = ['csv', 'table']
+LIST_FORMATS = ['csv', 'json', 'table']
 
+# Maximum number of nodes updated in parallel
+MAX_UPDATE_WORKERS = 16
 
-class Action(object):
+DEFAULT_COLUMNS = 'host,state,ram,cpu,reserved,until'
+
+
+class Action(enum.IntEnum):
     """Enumeration for the CLI Action."""
-    (LIST, RELEASE, RESERVE, GROUP, CAPABILITIES, SETUP, EXTEND) = range(7)
+    LIST = 0
+    RELEASE = 1
+    RESERVE = 2
+    GROUP = 3
+    CAPABILITIES = 4
+    SETUP = 5
+    EXTEND = 6
 
 
-class Columns(object):
+class Columns(enum.IntEnum):
     """Enumeration for the columns."""
-    (HOST, STATE, RAM, CPU, RESERVED, UNTIL, GROUPS,
-     CAPABILITIES) = range(8)
-
-    DEFAULT = 'host,state,ram,cpu,reserved,until'
+    HOST = 0
+    STATE = 1
+    RAM = 2
+    CPU = 3
+    RESERVED = 4
+    UNTIL = 5
+    GROUPS = 6
+    CAPABILITIES = 7
 
     @staticmethod
     def get_columns(columns_string):
         columns = []
         for column in columns_string.split(','):
-            if column.upper() in Columns.__dict__:
-                columns.append(Columns.__dict__.get(column.upper()))
-            else:
+            column_id = Columns.__members__.get(column.upper())
+            if column_id is None:
                 raise CommandError("Unknown column: %s" % column)
+            columns.append(column_id)
 
         return columns
 
     @staticmethod
     def to_str(column):
-        return {
-            Columns.HOST: 'Host',
-            Columns.STATE: 'State',
-            Columns.RAM: 'RAM',
-            Columns.CPU: 'CPU',
-            Columns.RESERVED: 'Reserved by',
-            Columns.UNTIL: 'Reserved until',
-            Columns.GROUPS: 'Groups',
-            Columns.CAPABILITIES: 'Capabilities',
-        }[column]
+        return _COLUMN_LABELS[column]
 
     @staticmethod
-    def to_data(node, column):
-        return {
-            Columns.HOST: node.get_name(),
-            Columns.STATE: node.get_node_status_str(),
-            Columns.RAM: node.node_details.get_physical_ram(),
-            Columns.CPU: node.node_details.get_capability('cpu'),
-            Columns.RESERVED: node.get_reservation_owner(),
-            Columns.UNTIL: node.get_reservation_endtime(),
-            Columns.GROUPS: ",".join(sorted(
-                                     node.node_details.get_node_labels())),
-            Columns.CAPABILITIES: node.node_details.get_capabilities(),
-        }[column]
+    def get_data_getters(columns):
+        return [_COLUMN_GETTERS[column] for column in columns]
+
+
+# Column labels and data getters, indexed by the Columns values
+_COLUMN_LABELS = (
+    'Host',
+    'State',
+    'RAM',
+    'CPU',
+    'Reserved by',
+    'Reserved until',
+    'Groups',
+    'Capabilities',
+)
+
+_COLUMN_GETTERS = (
+    lambda node: node.get_name(),
+    lambda node: node.get_node_status_str(),
+    lambda node: node.node_details.get_physical_ram(),
+    lambda node: node.node_details.get_capability('cpu'),
+    lambda node: node.get_reservation_owner(),
+    lambda node: node.get_reservation_endtime(),
+    lambda node: ",".join(sorted(node.node_details.get_node_labels())),
+    lambda node: node.node_details.get_capabilities(),
+)
+
+
+class ShellArgumentParser(argparse.ArgumentParser):
+    """Main parser which may have only the requested subparser built.
+
+    Errors are reported by the parser with all the subparsers, so the
+    usage lists all the subcommands.
+    """
+    full_parser_builder = None
+
+    def error(self, message):
+        if self.full_parser_builder is not None:
+            self.full_parser_builder().error(message)
+        super(ShellArgumentParser, self).error(message)
 
 
 class JenkinsNodeShell(object):
 
-    def get_base_parser(self):
+    # Subcommand name and method adding its subparser, in the help order
+    ACTION_PARSERS = (
+        ('list', '_add_list_parser'),
+        ('release', '_add_release_parser'),
+        ('reserve', '_add_reserve_parser'),
+        ('extend', '_add_extend_parser'),
+        ('group', '_add_group_parser'),
+        ('capability', '_add_capability_parser'),
+        ('setup', '_add_setup_parser'),
+    )
+
+    def get_base_parser(self, argv=None):
         formatter = argparse.ArgumentDefaultsHelpFormatter
 
         # Config parser
@@ -132,12 +172,12 @@ class JenkinsNodeShell(object):
                                        '[DEVNEST_PASSWORD]')
 
         # Main parser
-        parser = argparse.ArgumentParser(prog='devnest',
-                                         parents=[config_group],
-                                         description='CLI to reserve, release'
-                                         ' or manage hardware in DevNest.',
-                                         formatter_class=formatter,
-                                         add_help=False)
+        parser = ShellArgumentParser(prog='devnest',
+                                     parents=[config_group],
+                                     description='CLI to reserve, release'
+                                     ' or manage hardware in DevNest.',
+                                     formatter_class=formatter,
+                                     add_help=False)
 
         subparsers = parser.add_subparsers(title='node action subcommands',
                                            help='possible actions')
@@ -171,18 +211,62 @@ class JenkinsNodeShell(object):
                                 action='store_true',
                                 help=argparse.SUPPRESS)
 
+        # Build only the subparser of the requested action, all of them
+        # are needed to show the help or to report an unknown action
+        action_name = _get_action_name(argv, parser, self.ACTION_PARSERS)
+        for name, parser_builder in self.ACTION_PARSERS:
+            if action_name is None or name == action_name:
+                getattr(self, parser_builder)(subparsers, formatter,
+                                              node_parser, nest_parser)
+
+        if action_name is not None:
+            parser.full_parser_builder = self.get_base_parser
+
+        return parser
+
+    def _add_list_parser(self, subparsers, formatter, node_parser,
+                         nest_parser):
         list_parser = subparsers.add_parser('list',
                                             parents=[node_parser, nest_parser],
                                             formatter_class=formatter,
                                             help='list available node(s)')
         list_parser.set_defaults(action=Action.LIST)
 
+        list_parser.add_argument('-f', '--format',
+                                 default='table',
+                                 choices=LIST_FORMATS,
+                                 help='Parseable output')
+
+        list_parser.add_argument('-c', '--column',
+                                 default=DEFAULT_COLUMNS,
+                                 help='Columns to show')
+
+        list_parser.add_argument('-s', '--state',
+                                 help='Limit output to defined state only')
+
+    def _add_release_parser(self, subparsers, formatter, node_parser,
+                            nest_parser):
         release_parser = subparsers.add_parser('release',
                                                parents=[node_parser],
                                                formatter_class=formatter,
                                                help='release node(s)')
         release_parser.set_defaults(action=Action.RELEASE)
 
+        # Release - force releases server reserved by different user
+        release_parser.add_argument('-f', '--force',
+                                    action='store_true',
+                                    help=argparse.SUPPRESS)
+
+        # Release - brings node online after reservation is released
+        release_parser.add_argument('-o', '--online',
+                                    action='store_true',
+                                    help=argparse.SUPPRESS)
+        release_parser.add_argument('-p', '--pending',
+                                    action='store_true',
+                                    help=argparse.SUPPRESS)
+
+    def _add_reserve_parser(self, subparsers, formatter, node_parser,
+                            nest_parser):
         reserve_parser = subparsers.add_parser('reserve',
                                                parents=[node_parser,
                                                         nest_parser],
@@ -190,27 +274,6 @@ class JenkinsNodeShell(object):
                                                help='reserve node')
         reserve_parser.set_defaults(action=Action.RESERVE)
 
-        extend_parser = subparsers.add_parser('extend',
-                                              parents=[node_parser],
-                                              formatter_class=formatter,
-                                              help='extend reservation')
-
-        extend_parser.set_defaults(action=Action.EXTEND)
-
-        # List
-        list_parser.add_argument('-f', '--format',
-                                 default='table',
-                                 help='Parseable output, '
-                                 'options: csv,json,table')
-
-        list_parser.add_argument('-c', '--column',
-                                 default=Columns.DEFAULT,
-                                 help='Columns to show')
-
-        list_parser.add_argument('-s', '--state',
-                                 help='Limit output to defined state only')
-
-        # Reserve
         reserve_parser.add_argument('-t', '--time',
                                     type=int,
                                     default=3,
@@ -230,7 +293,15 @@ class JenkinsNodeShell(object):
                                          'After such reservation wait until CI job will '
                                          'finish - state will become "reserved"')
 
-        # Extend
+    def _add_extend_parser(self, subparsers, formatter, node_parser,
+                           nest_parser):
+        extend_parser = subparsers.add_parser('extend',
+                                              parents=[node_parser],
+                                              formatter_class=formatter,
+                                              help='extend reservation')
+
+        extend_parser.set_defaults(action=Action.EXTEND)
+
         extend_parser.add_argument('-t', '--time',
                                    type=int,
                                    required=True,
@@ -241,19 +312,8 @@ class JenkinsNodeShell(object):
                                    action='store_true',
                                    help=argparse.SUPPRESS)
 
-        # Release - force releases server reserved by different user
-        release_parser.add_argument('-f', '--force',
-                                    action='store_true',
-                                    help=argparse.SUPPRESS)
-
-        # Release - brings node online after reservation is released
-        release_parser.add_argument('-o', '--online',
-                                    action='store_true',
-                                    help=argparse.SUPPRESS)
-        release_parser.add_argument('-p', '--pending',
-                                    action='store_true',
-                                    help=argparse.SUPPRESS)
-
+    def _add_group_parser(self, subparsers, formatter, node_parser,
+                          nest_parser):
         # Group parser
         groups_parser = argparse.ArgumentParser(add_help=False)
         manage_group = groups_parser.add_mutually_exclusive_group(required=True)
@@ -283,6 +343,8 @@ class JenkinsNodeShell(object):
                                                    'with caution')
         manage_parser.set_defaults(action=Action.GROUP)
 
+    def _add_capability_parser(self, subparsers, formatter, node_parser,
+                               nest_parser):
         # Capability parser
         capability_parser = argparse.ArgumentParser(add_help=False)
         capability_group = \
@@ -298,6 +360,8 @@ class JenkinsNodeShell(object):
                                            help='manage node capabilities')
         capability.set_defaults(action=Action.CAPABILITIES)
 
+    def _add_setup_parser(self, subparsers, formatter, node_parser,
+                          nest_parser):
         # Node setup parser
         setup = subparsers.add_parser('setup',
                                       formatter_class=formatter,
@@ -308,8 +372,6 @@ class JenkinsNodeShell(object):
 
         setup.set_defaults(action=Action.SETUP)
 
-        return parser
-
     def _get_default_config(self):
         """Return path to the default jenkins config if exists
 
@@ -325,7 +387,7 @@ class JenkinsNodeShell(object):
         return config_path
 
     def parse_args(self, argv):
-        parser = self.get_base_parser()
+        parser = self.get_base_parser(argv)
         args = parser.parse_args(argv)
 
         parseable_output = False
@@ -342,8 +404,9 @@ class JenkinsNodeShell(object):
             LOG.setLevel(level=logging.ERROR)
 
         if not args.conf and not (args.user and args.password and args.url):
-            if self._get_default_config():
-                args.conf = self._get_default_config()
+            default_config = self._get_default_config()
+            if default_config:
+                args.conf = default_config
             else:
                 raise CommandError("You must provide either username, password"
                                    " and url or path to configuration file"
@@ -353,175 +416,329 @@ class JenkinsNodeShell(object):
 
     def main(self, argv):
         parser_args = self.parse_args(argv)
-        LOG.debug("%s" % parser_args)
+        LOG.debug("%s", parser_args)
+
+        # Imported after the arguments are parsed, so the help and
+        # invalid arguments are not slowed down by the Jenkins libraries
+        from devnest.lib.jenkins import JenkinsInstance
 
         jenkins_obj = JenkinsInstance(parser_args.url, parser_args.user,
                                       parser_args.password, parser_args.conf)
 
-        # List nodes
-        if parser_args.action is Action.LIST:
-            group = parser_args.group
-            if parser_args.all:
-                group = None
-
-            jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group)
-
-            if parser_args.state:
-                jenkins_nodes = [node for node in jenkins_nodes
-                                 if parser_args.state.lower()
-                                 in node.get_node_status_str()]
-
-            if parser_args.format is None or parser_args.format == 'table':
-                print(_get_node_table_str(jenkins_nodes, parser_args.column))
-            elif parser_args.format == 'json':
-                print(json.dumps(list(map(lambda node: node.to_dict(),
-                                          jenkins_nodes))))
-            elif parser_args.format in LIST_FORMATS:
-                print(_get_node_parseable_str(jenkins_nodes,
-                                              parser_args.column))
-            else:
-                err_msg = "List format '%s' is not supported." \
-                          % parser_args.format
-                raise CommandError(err_msg)
-
-        # Reserve node
-        if parser_args.action is Action.RESERVE:
-            reservation_time = parser_args.time
-            group = parser_args.group
-            if parser_args.all:
-                group = None
-            jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group)
-
-            if len(jenkins_nodes) != 1:
-                err_msg = "Found %s nodes maching your reservation" \
-                          % len(jenkins_nodes)
-                if len(jenkins_nodes) > 1:
-                    err_msg += ". Please specify only one.\n" \
-                               + _get_node_table_str(jenkins_nodes)
-                raise CommandError(err_msg)
-
-            reserve_node = jenkins_nodes[0]
-
-            if reserve_node.get_node_status() == NodeStatus.JOB_RUNNING and \
-               not parser_args.force:
-                err_msg = "Node %s is currently running CI job. Use --force flag " \
-                          "to reserve the node.\n\tAfter doing so, use:\n\t" \
-                          "    $ devnest list -g %s %s\n\tTo check if " \
-                          "CI job is finished and you can use it - node "\
-                          "status will become reserved.\n\tThis may take even few hours!" \
-                          "\n\tMore details about current node usage is available at:" \
-                          "\n\t    %s" \
-                          % (reserve_node.get_name(), group,
-                             reserve_node.get_name(),
-                             reserve_node.get_node_url())
-
-                raise CommandError(err_msg)
-
-            if reserve_node.get_node_status() != NodeStatus.ONLINE and \
-               not parser_args.force:
-                err_msg = "Node %s is not online and can not be reserved. " \
-                    % reserve_node.get_name()
-                err_msg += "Node status: %s. Try release the node." \
-                    % reserve_node.get_node_status_str()
-                raise CommandError(err_msg)
-
-            reservation_owner = parser_args.owner
-            info = reserve_node.reserve(
-                reservation_time, owner=reservation_owner,
-                force_reserve=parser_args.force)
-            if parser_args.json:
-                print(json.dumps(info))
-
-        # Extend Reservation
-        if parser_args.action is Action.EXTEND:
-            jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group=None)
-
-            if len(jenkins_nodes) != 1:
-                err_msg = "Found %s nodes maching your node pattern" \
-                          % len(jenkins_nodes)
-                if len(jenkins_nodes) > 1:
-                    err_msg += ". Please specify only one.\n" \
-                               + _get_node_table_str(jenkins_nodes)
-                raise CommandError(err_msg)
-
-            node = jenkins_nodes[0]
-            node.extend_reservation(parser_args.time, parser_args.force)
-
-        # Clear Reservation
-        if parser_args.action is Action.RELEASE:
-            jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group=None)
-
-            if len(jenkins_nodes) != 1:
-                err_msg = "Found %s nodes maching your node pattern" \
-                          % len(jenkins_nodes)
-                if len(jenkins_nodes) > 1:
-                    err_msg += ". Please specify only one.\n" \
-                               + _get_node_table_str(jenkins_nodes)
-                raise CommandError(err_msg)
-
-            reserve_node = jenkins_nodes[0]
-
-            if parser_args.pending:
-                reserve_node.set_reprovision_pending()
-            else:
-                reserve_user = reserve_node.get_reservation_owner()
-                jenkins_user = jenkins_obj.get_jenkins_username()
-                if reserve_user != jenkins_user and not parser_args.force:
-                    err_msg = "Node %s is reserved by %s and can not " \
-                              "be released unless used with --force flag." \
-                        % (reserve_node.get_name(), reserve_user)
-                    raise CommandError(err_msg)
-
-                reserve_node.clear_reservation(bring_online=parser_args.online)
-
-        # Group manage
-        if parser_args.action is Action.GROUP:
-            jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group=None)
-
-            # group -g
-            if parser_args.get:
-                all_groups = []
-                for node in jenkins_nodes:
-                    all_groups += node.node_details.get_node_labels()
-                print("Available groups: " + ",".join(list(set(all_groups))))
-            else:
-                if len(jenkins_nodes) != 1:
-                    err_msg = "Found %s nodes maching your node pattern" \
-                              % len(jenkins_nodes)
-                    if len(jenkins_nodes) > 1:
-                        err_msg += ". Please specify only one.\n" \
-                                   + _get_node_table_str(jenkins_nodes)
-                    raise CommandError(err_msg)
-
-                node = jenkins_nodes[0]
-
-                if parser_args.clear:
-                    node.clear_all_groups()
-                elif parser_args.set:
-                    groups = parser_args.set.split(",")
-                    node.update_with_groups(groups)
-                elif parser_args.add:
-                    groups = parser_args.add.split(",")
-                    node.add_groups(groups)
-                elif parser_args.remove:
-                    groups = parser_args.remove.split(",")
-                    node.remove_groups(groups)
-
-        # Capabilities
-        if parser_args.action is Action.CAPABILITIES:
-            jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group=None)
-
-            # capabilities -s
-            if parser_args.set:
-                for node in jenkins_nodes:
-                    node.update_capabilities(parser_args.set)
-
-        if parser_args.action is Action.SETUP:
-            if parser_args.file:
-                jenkins_obj.create_update_node_from_xml(parser_args.file)
-
-
-def _get_node_table_str(jenkins_nodes, columns=Columns.DEFAULT):
+        ACTION_HANDLERS[parser_args.action](parser_args, jenkins_obj)
+
+
+def _do_list(parser_args, jenkins_obj):
+    """List nodes.
+
+    Args:
+        parser_args (:obj:`argparse.Namespace`): parsed arguments
+        jenkins_obj (:obj:`JenkinsInstance`): Jenkins instance
+    """
+    group = parser_args.group
+    if parser_args.all:
+        group = None
+
+    jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group)
+
+    if parser_args.state:
+        state = parser_args.state.lower()
+        jenkins_nodes = [node for node in jenkins_nodes
+                         if state in node.get_node_status_str().lower()]
+
+    if parser_args.format == 'table':
+        print(_get_node_table_str(jenkins_nodes, parser_args.column))
+    elif parser_args.format == 'json':
+        import json
+        print(json.dumps(list(map(lambda node: node.to_dict(),
+                                  jenkins_nodes))))
+    elif parser_args.format == 'csv':
+        print(_get_node_parseable_str(jenkins_nodes,
+                                      parser_args.column))
+
+
+def _do_reserve(parser_args, jenkins_obj):
+    """Reserve node.
+
+    Args:
+        parser_args (:obj:`argparse.Namespace`): parsed arguments
+        jenkins_obj (:obj:`JenkinsInstance`): Jenkins instance
+    """
+    from devnest.lib.node import NodeStatus
+
+    reservation_time = parser_args.time
+    group = parser_args.group
+    if parser_args.all:
+        group = None
+    jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group)
+
+    if len(jenkins_nodes) != 1:
+        err_msg = "Found %s nodes maching your reservation" \
+                  % len(jenkins_nodes)
+        if len(jenkins_nodes) > 1:
+            err_msg += ". Please specify only one.\n" \
+                       + _get_node_table_str(jenkins_nodes)
+        raise CommandError(err_msg)
+
+    reserve_node = jenkins_nodes[0]
+    node_status = reserve_node.get_node_status()
+
+    if node_status == NodeStatus.JOB_RUNNING and not parser_args.force:
+        err_msg = "Node %s is currently running CI job. Use --force flag " \
+                  "to reserve the node.\n\tAfter doing so, use:\n\t" \
+                  "    $ devnest list -g %s %s\n\tTo check if " \
+                  "CI job is finished and you can use it - node "\
+                  "status will become reserved.\n\tThis may take even few hours!" \
+                  "\n\tMore details about current node usage is available at:" \
+                  "\n\t    %s" \
+                  % (reserve_node.get_name(), group,
+                     reserve_node.get_name(),
+                     reserve_node.get_node_url())
+
+        raise CommandError(err_msg)
+
+    if node_status != NodeStatus.ONLINE and not parser_args.force:
+        err_msg = "Node %s is not online and can not be reserved. " \
+            % reserve_node.get_name()
+        err_msg += "Node status: %s. Try release the node." \
+            % reserve_node.get_node_status_str()
+        raise CommandError(err_msg)
+
+    reservation_owner = parser_args.owner
+    info = reserve_node.reserve(
+        reservation_time, owner=reservation_owner,
+        force_reserve=parser_args.force)
+    if parser_args.json:
+        import json
+        print(json.dumps(info))
+
+
+def _do_extend(parser_args, jenkins_obj):
+    """Extend node reservation.
+
+    Args:
+        parser_args (:obj:`argparse.Namespace`): parsed arguments
+        jenkins_obj (:obj:`JenkinsInstance`): Jenkins instance
+    """
+    jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group=None)
+
+    if len(jenkins_nodes) != 1:
+        err_msg = "Found %s nodes maching your node pattern" \
+                  % len(jenkins_nodes)
+        if len(jenkins_nodes) > 1:
+            err_msg += ". Please specify only one.\n" \
+                       + _get_node_table_str(jenkins_nodes)
+        raise CommandError(err_msg)
+
+    node = jenkins_nodes[0]
+    node.extend_reservation(parser_args.time, parser_args.force)
+
+
+def _do_release(parser_args, jenkins_obj):
+    """Clear node reservation.
+
+    Args:
+        parser_args (:obj:`argparse.Namespace`): parsed arguments
+        jenkins_obj (:obj:`JenkinsInstance`): Jenkins instance
+    """
+    jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group=None)
+
+    if len(jenkins_nodes) != 1:
+        err_msg = "Found %s nodes maching your node pattern" \
+                  % len(jenkins_nodes)
+        if len(jenkins_nodes) > 1:
+            err_msg += ". Please specify only one.\n" \
+                       + _get_node_table_str(jenkins_nodes)
+        raise CommandError(err_msg)
+
+    reserve_node = jenkins_nodes[0]
+
+    if parser_args.pending:
+        reserve_node.set_reprovision_pending()
+    else:
+        reserve_user = reserve_node.get_reservation_owner()
+        jenkins_user = jenkins_obj.get_jenkins_username()
+        if reserve_user != jenkins_user and not parser_args.force:
+            err_msg = "Node %s is reserved by %s and can not " \
+                      "be released unless used with --force flag." \
+                % (reserve_node.get_name(), reserve_user)
+            raise CommandError(err_msg)
+
+        reserve_node.clear_reservation(bring_online=parser_args.online)
+
+
+def _do_group(parser_args, jenkins_obj):
+    """Manage node groups.
+
+    Args:
+        parser_args (:obj:`argparse.Namespace`): parsed arguments
+        jenkins_obj (:obj:`JenkinsInstance`): Jenkins instance
+    """
+    jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group=None)
+
+    # group -g
+    if parser_args.get:
+        all_groups = set()
+        for node in jenkins_nodes:
+            all_groups.update(node.node_details.get_node_labels())
+        print("Available groups: " + ",".join(sorted(all_groups)))
+    else:
+        if len(jenkins_nodes) != 1:
+            err_msg = "Found %s nodes maching your node pattern" \
+                      % len(jenkins_nodes)
+            if len(jenkins_nodes) > 1:
+                err_msg += ". Please specify only one.\n" \
+                           + _get_node_table_str(jenkins_nodes)
+            raise CommandError(err_msg)
+
+        node = jenkins_nodes[0]
+
+        if parser_args.clear:
+            node.clear_all_groups()
+        elif parser_args.set:
+            groups = parser_args.set.split(",")
+            node.update_with_groups(groups)
+        elif parser_args.add:
+            groups = parser_args.add.split(",")
+            node.add_groups(groups)
+        elif parser_args.remove:
+            groups = parser_args.remove.split(",")
+            node.remove_groups(groups)
+
+
+def _do_capabilities(parser_args, jenkins_obj):
+    """Update node capabilities.
+
+    Args:
+        parser_args (:obj:`argparse.Namespace`): parsed arguments
+        jenkins_obj (:obj:`JenkinsInstance`): Jenkins instance
+    """
+    jenkins_nodes = jenkins_obj.get_nodes(parser_args.node_regex, group=None)
+
+    # capabilities -s
+    if parser_args.set and jenkins_nodes:
+        # Each update is a few Jenkins requests, run them in parallel
+        from multiprocessing.pool import ThreadPool
+
+        pool = ThreadPool(min(MAX_UPDATE_WORKERS, len(jenkins_nodes)))
+        result = pool.map_async(
+            lambda node: _update_node_capabilities(node, parser_args.set),
+            jenkins_nodes)
+        pool.close()
+
+        # On Python 2 only a wait with timeout can be interrupted by
+        # Ctrl-C, the worker threads are daemons and end with the process
+        while not result.ready():
+            result.wait(1)
+        pool.join()
+
+        failed_nodes = [node.get_name()
+                        for node, updated in zip(jenkins_nodes, result.get())
+                        if not updated]
+        if failed_nodes:
+            raise CommandError("Failed to update capabilities of node(s): %s"
+                               % ",".join(failed_nodes))
+
+
+def _update_node_capabilities(node, capabilities):
+    """Update node capabilities, logging the failure.
+
+    Args:
+        node (:obj:`Node`): node to update
+        capabilities (:obj:`str`): json string representing capabilities
+
+    Returns:
+        (:obj:`bool`): True if the node was updated
+    """
+    try:
+        node.update_capabilities(capabilities)
+    except Exception as ex:
+        LOG.error("Node %s: %s", node.get_name(),
+                  getattr(ex, 'message', None) or str(ex),
+                  exc_info=LOG.isEnabledFor(logging.DEBUG))
+        return False
+
+    return True
+
+
+def _do_setup(parser_args, jenkins_obj):
+    """Create or update node from the XML config.
+
+    Args:
+        parser_args (:obj:`argparse.Namespace`): parsed arguments
+        jenkins_obj (:obj:`JenkinsInstance`): Jenkins instance
+    """
+    if parser_args.file:
+        jenkins_obj.create_update_node_from_xml(parser_args.file)
+
+
+ACTION_HANDLERS = {
+    Action.LIST: _do_list,
+    Action.RELEASE: _do_release,
+    Action.RESERVE: _do_reserve,
+    Action.GROUP: _do_group,
+    Action.CAPABILITIES: _do_capabilities,
+    Action.SETUP: _do_setup,
+    Action.EXTEND: _do_extend,
+}
+
+
+def _get_action_name(argv, parser, action_parsers):
+    """Return name of the subcommand passed on the command line.
+
+    Global options are taken from the main parser, like argparse long
+    options may be abbreviated and short flags combined.
+
+    Args:
+        argv (:obj:`list`): command line arguments
+        parser (:obj:`argparse.ArgumentParser`): main parser
+        action_parsers (:obj:`tuple`): known subcommands
+
+    Returns:
+        (:obj:`str`): subcommand name or None if not found, unknown or
+                      if the main help is requested
+    """
+    if argv is None:
+        return None
+
+    help_options = []
+    value_options = []
+    for action in parser._actions:
+        if isinstance(action, argparse._HelpAction):
+            help_options.extend(action.option_strings)
+        elif action.nargs != 0:
+            value_options.extend(action.option_strings)
+
+    action_names = [name for name, _ in action_parsers]
+    args = iter(argv)
+    for arg in args:
+        if arg.startswith('--') and len(arg) > 2:
+            if '=' in arg:
+                # Option with its value
+                continue
+            if any(option.startswith(arg) for option in help_options):
+                # The main help lists all the subcommands
+                return None
+            if any(option.startswith(arg) for option in value_options):
+                # Skip the option value
+                next(args, None)
+        elif arg.startswith('-') and len(arg) > 1:
+            # Short flags, e.g. -vh, until an option taking a value
+            for position, flag in enumerate(arg[1:], 2):
+                if '-' + flag in help_options:
+                    return None
+                if '-' + flag in value_options:
+                    if position == len(arg):
+                        # Skip the option value
+                        next(args, None)
+                    break
+        else:
+            return arg if arg in action_names else None
+
+    return None
+
+
+def _get_node_table_str(jenkins_nodes, columns=DEFAULT_COLUMNS):
     """Creates nicely formatted table with node info.
 
     Args:
@@ -533,16 +750,54 @@ def _get_node_table_str(jenkins_nodes, columns=Columns.DEFAULT):
     columns_list = Columns.get_columns(columns)
     table_data = [[Columns.to_str(x) for x in columns_list]]
 
-    node_list = [[Columns.to_data(jenkins_node, column)
-                  for column in columns_list]
+    getters = Columns.get_data_getters(columns_list)
+    node_list = [[getter(jenkins_node) for getter in getters]
                  for jenkins_node in jenkins_nodes]
     table_data.extend(node_list)
 
-    ascii_table = AsciiTable(table_data).table
-    return ascii_table
+    table_str = _get_ascii_table_str(table_data)
+    if table_str is None:
+        from terminaltables import AsciiTable
+        table_str = AsciiTable(table_data).table
+
+    return table_str
+
 
+def _get_ascii_table_str(table_data):
+    """Creates table with the same layout as terminaltables AsciiTable.
 
-def _get_node_parseable_str(jenkins_nodes, columns=Columns.DEFAULT):
+    Only ascii single line cells are handled, so the cell width is simply
+    its length, other tables are left to terminaltables.
+
+    Args:
+        table_data (:obj:`list`): table rows, starting with the header
+
+    Returns:
+        (:obj:`str`): Table ready to be printed or None if not supported
+    """
+    rows = [[cell if hasattr(cell, 'splitlines') else str(cell)
+             for cell in row]
+            for row in table_data]
+
+    text = "".join("".join(row) for row in rows)
+    if text.splitlines() != [text] or "\x1b" in text or \
+       len(text.encode('utf-8')) != len(text):
+        return None
+
+    widths = [max(len(cell) for cell in column) for column in zip(*rows)]
+    border = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+    lines = ["| " + " | ".join(cell.ljust(width)
+                               for cell, width in zip(row, widths)) + " |"
+             for row in rows]
+    if len(lines) > 1:
+        lines.insert(1, border)
+    lines.insert(0, border)
+    lines.append(border)
+
+    return "\n".join(lines)
+
+
+def _get_node_parseable_str(jenkins_nodes, columns=DEFAULT_COLUMNS):
     """Creates ; separated node info.
 
     Args:
@@ -551,49 +806,63 @@ def _get_node_parseable_str(jenkins_nodes, columns=Columns.DEFAULT):
     Returns:
         (:obj:`str`): Node info separated by ';'
     """
-    node_str = ""
-    count = 1
     columns_list = Columns.get_columns(columns)
-    for jenkins_node in jenkins_nodes:
-        node_str += ";".join([str(Columns.to_data(jenkins_node, column))
-                             for column in columns_list])
-        if count < len(jenkins_nodes):
-            node_str += "\n"
-        count += 1
-    return node_str
+    getters = Columns.get_data_getters(columns_list)
+    node_lines = [";".join([str(getter(jenkins_node)) for getter in getters])
+                  for jenkins_node in jenkins_nodes]
+    return "\n".join(node_lines)
+
+
+def _is_connection_error(ex):
+    """Check if exception is a requests ConnectionError.
+
+    requests is only imported with the Jenkins libraries, if it was not
+    loaded yet the exception can not come from it.
+
+    Args:
+        ex (:obj:`Exception`): exception to check
+
+    Returns:
+        (:obj:`bool`): True if it's a requests ConnectionError
+    """
+    requests_exceptions = sys.modules.get('requests.exceptions')
+    if requests_exceptions is None:
+        return False
+
+    return isinstance(ex, requests_exceptions.ConnectionError)
+
+
+# Python 2 has no monotonic clock
+_clock = getattr(time, 'monotonic', time.time)
 
 
 def main(args=None):
-    start_time = datetime.datetime.now()
+    start_time = _clock()
 
-    LOG.debug('Started devnest: %s' %
-              start_time.strftime('%Y-%m-%d %H:%M:%S'))
+    if LOG.isEnabledFor(logging.DEBUG):
+        LOG.debug('Started devnest: %s', time.strftime('%Y-%m-%d %H:%M:%S'))
 
     try:
         if args is None:
             args = sys.argv[1:]
 
         JenkinsNodeShell().main(args)
-    except NodeReservationError as ex:
-        LOG.error(ex.message)
-        sys.exit(1)
     except NodeCliException as ex:
         LOG.error(ex.message)
         sys.exit(1)
-    except ConnectionError as ex:
-        LOG.error(ex.message)
-        sys.exit(1)
-    except Exception:
-        raise
+    except Exception as ex:
+        if not _is_connection_error(ex):
+            raise
+        # Python 3 exceptions have no message attribute
+        LOG.error(str(ex))
         sys.exit(1)
     except KeyboardInterrupt:
         sys.exit(130)
     finally:
-        finish_time = datetime.datetime.now()
-        LOG.debug('Finished devnest: %s' %
-                  finish_time.strftime('%Y-%m-%d %H:%M:%S'))
-        LOG.debug('Run time: %s [H]:[M]:[S].[ms]' %
-                  str(finish_time - start_time))
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug('Finished devnest: %s',
+                      time.strftime('%Y-%m-%d %H:%M:%S'))
+            LOG.debug('Run time: %.3fs', _clock() - start_time)
 
 
 if __name__ == "__main__":
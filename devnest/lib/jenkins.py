@@ -62,8 +62,8 @@ class JenkinsInstance(object):
         self.jenkins_password = config_password if not password else password
 
         LOG.info('Using Jenkins URL: %s' % self.jenkins_url)
-        LOG.debug('Using username: %s' % self.jenkins_username)
-        LOG.debug('Using password: %s' % self.jenkins_password)
+        LOG.debug('Using username: %s', self.jenkins_username)
+        LOG.debug('Using password: %s', self.jenkins_password)
 
         self.jenkins = self._get_jenkins_instance()
 
@@ -139,7 +139,7 @@ class JenkinsInstance(object):
                                                            % baseurl,
                                                            data=config_str)
         except JenkinsAPIException:
-            LOG.debug('Node %s not found, adding new' % slave_name)
+            LOG.debug('Node %s not found, adding new', slave_name)
             self.jenkins.create_node(slave_name, labels='provisioning_node')
             self.jenkins.requester.post_and_confirm_status("%s/config.xml"
                                                            % baseurl,
@@ -168,7 +168,7 @@ class JenkinsInstance(object):
                                                        baseurl=self.jenkins_url,
                                                        ssl_verify=False))
 
-        LOG.debug('Connected to Jenkins, Version: %s' % jenkins_obj.version)
+        LOG.debug('Connected to Jenkins, Version: %s', jenkins_obj.version)
 
         return jenkins_obj
 
@@ -185,7 +185,7 @@ class JenkinsInstance(object):
         password = None
 
         config = ConfigParser.RawConfigParser()
-        LOG.debug('Reading config from: %s' % config_file)
+        LOG.debug('Reading config from: %s', config_file)
 
         cfg = config.read(config_file)
 
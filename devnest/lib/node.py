@@ -613,7 +613,7 @@ class Node(object):
             capabilities = json_data.get('capabilities')
         except (ValueError, AttributeError):
             LOG.debug('Could not read details data for '
-                      'node: %s' % self.get_name())
+                      'node: %s', self.get_name())
 
         physical_ram = self._get_total_physical_mem()
 
@@ -657,8 +657,8 @@ class Node(object):
 
             except ValueError:
                 LOG.debug('Could not read reservation data for node %s,'
-                          ' invalid json format: %s' % (self.get_name(),
-                                                        offline_cause_reason))
+                          ' invalid json format: %s', self.get_name(),
+                          offline_cause_reason)
 
         return reservation_info
 
@@ -753,8 +753,8 @@ class Node(object):
             node_details(:obj:`NodeDetails`): update node with NodeDetails
         """
         description_str = self._get_config_data('description')
-        LOG.debug('Node %s, description: %s' % (self.get_name(),
-                                                description_str))
+        LOG.debug('Node %s, description: %s', self.get_name(),
+                  description_str)
         # Remove extra metadata from the description
         if START_TAG in description_str and END_TAG in description_str:
             description_regex = START_TAG + ".*?" + END_TAG
@@ -806,14 +806,14 @@ class Node(object):
 
         config_str = ElementTree.tostring(slave_xml)
 
-        LOG.debug('Node %s, config changed %s: %s' % (self.get_name(),
-                                                      tag, data_str))
+        LOG.debug('Node %s, config changed %s: %s', self.get_name(),
+                  tag, data_str)
         return config_str
 
     def _upload_config_data(self, config_str):
         node = self._get_node_instance()
         node.upload_config(config_str)
-        LOG.debug('Node %s, config uploaded' % self.get_name())
+        LOG.debug('Node %s, config uploaded', self.get_name())
 
     def _get_config_data(self, tag):
         """Get node config data